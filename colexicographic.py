@@ -7,19 +7,25 @@ itertools.combinations_with_replacement that:
 2. Can handle infinite input iterables
 """
 
-_MAX_NESTED = 20
+from itertools import islice as _islice, repeat as _repeat
+from math import comb as _comb
+from operator import index as _index
+from sys import maxsize as _maxsize
+
+_MAX_NESTED = 20   # CPython's limit on statically nested blocks, so larger r cannot be generated
 _INDENT = "    "
+_ZIP_RUN = 16   # Inner loops of at least _ZIP_RUN * r elements run with zip (shorter ones don't repay its setup)
 
 def _0_combinations(iterable):
     yield ()
 
 def _1_combinations(iterable):
-    for x0 in iterable:
-        yield (x0, )
+    yield from zip(iterable)
 
 def _2_combinations(stream):
     i1 = 0
     queue = [None] * 2
+    append = queue.append
     for x1 in stream:
         queue[i1] = x1
         i1 += 1
@@ -28,43 +34,102 @@ def _2_combinations(stream):
             break
     
     for x1 in stream:
-        for x0 in queue:
-            yield x0, x1
-        queue.append(x1)
+        yield from zip(queue, _repeat(x1))
+        append(x1)
 
 def _2_combinations_with_replacement(iterable):
     queue = []
+    append = queue.append
     for x1 in iterable:
-        queue.append(x1)
-        for x0 in queue:
-            yield x0, x1
+        append(x1)
+        yield from zip(queue, _repeat(x1))
+
+def _define_function(code, name):
+    """Compile and execute generated source (a list of lines), and return the function it defines"""
+    namespace = {'_repeat': _repeat}
+    exec(compile('\n'.join(code), f"<colexicographic {name}>", 'exec', optimize=2), namespace)
+    return namespace[name]
+
+def _batches(iterator, batch_size):
+    while batch := list(_islice(iterator, batch_size)):
+        yield batch
 
 class _combinations_base:
     """Base class for combinations and combinations_with_replacement"""
     
+    __slots__ = ('_r', '_stream', '_length')
+    
     def __init__(self, iterable, r):
         self._r = self.indexify(r)
         self._stream = iter(iterable)   # Insure a single pass on the input iterable
         if self._r < 0:
             raise ValueError("r must be non-negative")
+        self._length = None   # Number of input elements, if known (only used as a hint)
+        if hasattr(iterable, '__len__'):   # Guard keeps construction from unsized inputs (iterators, generators) cheap - no exception raised
+            try:
+                self._length = len(iterable)
+            except Exception:   # __len__ fails (e.g. OverflowError for range(2**70)) - iteration still works
+                pass
         
         if self._r <= _MAX_NESTED and self._r not in self._nested_function_cache:
-            self._nested_function_cache[self._r] = self._nested_function(self._r)
+            self._cache_nested_function(self._nested_function_cache, self._r)
+    
+    @classmethod
+    def _cache_nested_function(cls, cache, r, callback=False):
+        """Generate the nested function for r into cache, or cache None if it cannot be generated"""
+        try:
+            cache[r] = cls._nested_function(r, callback)
+        except SyntaxError:   # Interpreter with a lower nesting limit - cache None, to use _unnested
+            cache[r] = None
     
     @staticmethod
     def indexify(r):
         """Return the integer interpretation of r, using __index__"""
-        if not hasattr(r, '__index__'):
-            raise TypeError(f"'{type(r).__name__}' object cannot be interpreted as an integer")
-        ind = r.__index__()
-        if not isinstance(r, int):
-            raise TypeError(f"__index__ returned non-int (type {type(ind).__name__})")
-        return ind
+        return _index(r)
     
     def __iter__(self):
-        if self._r in self._nested_function_cache:
-            return self._nested_function_cache[self._r](self._stream)
+        nested_function = self._nested_function_cache.get(self._r)
+        if nested_function is not None:
+            return nested_function(self._stream)
         return self._unnested(self._stream, self._r)
+    
+    def __length_hint__(self):
+        """Return the number of combinations when the input iterable is sized (lets list() preallocate).
+        
+        This is the count before iteration - it is not reduced as combinations are consumed."""
+        if self._length is None:
+            return NotImplemented
+        count = self._count(self._length, self._r)
+        return count if count <= _maxsize else NotImplemented
+    
+    def batched(self, batch_size=4096):
+        """Return an iterator yielding lists of up to batch_size consecutive combinations.
+        
+        Each batch is a list built from the ordinary iterator (which still resumes once per combination),
+        so only the consumer's own loop runs once per batch instead of once per combination."""
+        batch_size = self.indexify(batch_size)
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        return _batches(iter(self), batch_size)
+    
+    @classmethod
+    def for_each(cls, iterable, r, fn):
+        """Call fn(x0, x1, ..., x{r-1}) for each combination, in the same order as iteration.
+        
+        For 3 <= r <= _MAX_NESTED, fn is called directly from the nested loops, with no
+        tuple built and no generator resumed per combination. On infinite input this only
+        returns if fn raises."""
+        instance = cls(iterable, r)
+        r = instance._r
+        cache = cls._callback_function_cache
+        if 3 <= r <= _MAX_NESTED and r not in cache:
+            cls._cache_nested_function(cache, r, callback=True)
+        callback_function = cache.get(r)
+        if callback_function is not None:
+            callback_function(instance._stream, fn)
+        else:
+            for sequence in instance:
+                fn(*sequence)
 
 class combinations(_combinations_base):
     """Return r length subsequences of elements from the input iterable in colexicographic order.
@@ -80,85 +145,121 @@ class combinations(_combinations_base):
         combinations('ABCD', 2) → AB AC BC AD BD CD
     """
     
+    __slots__ = ()
     _nested_function_cache = {0: _0_combinations, 1: _1_combinations, 2: _2_combinations}
+    _callback_function_cache = {}
     
     @staticmethod
-    def _nested_function(r):
+    def _count(n, r):
+        """Number of combinations of length r from n elements"""
+        return _comb(n, r)
+    
+    @staticmethod
+    def _nested_function(r, callback=False):
         """Returns a function yielding sequences of length r from input generator.
         
-        Implemented with r nested loops, and r must be >= 3."""
+        Implemented with r nested loops, and r must be >= 3.
+        If callback, the function takes (stream, fn) and calls fn with the elements of each sequence instead."""
         if r < 3:
             raise ValueError("r must be at least 3")
         
         # Function definition, queue initilization, and outer loop:
-        code = [f"def _{r}_combinations(stream):",
+        code = [f"def _{r}_combinations(stream{', fn' if callback else ''}):",
                 _INDENT + f"i{r-1} = 0",
                 _INDENT + f"queue = [None] * {r}",
+                _INDENT + "append = queue.append",
                 _INDENT + f"for x{r-1} in stream:",
                 _INDENT * 2 + f"queue[i{r-1}] = x{r-1}",
                 _INDENT * 2 + f"i{r-1} += 1",
                 _INDENT * 2 + f"if i{r-1} == {r}:",
-                _INDENT * 3 + "yield tuple(queue)",
+                _INDENT * 3 + ("fn(*queue)" if callback else "yield tuple(queue)"),
                 _INDENT * 3 + "break",
                 _INDENT + f"for x{r-1} in stream:"]
         
-        # Nested loops:
-        for j in range(r - 2):
-            code.append(_INDENT * (j+2) + f"for i{r-j-2} in range({r-j-2}, i{r-j-1}):")
-            code.append(_INDENT * (j+3) + f"x{r-j-2} = queue[i{r-j-2}]")
+        # Nested loops on x{r-2}, ..., x2 (their order, with x0 varying fastest, is what makes the output colexicographic):
+        loops = []
+        for j in range(r - 3):
+            loops.append(_INDENT * j + f"for i{r-j-2} in range({r-j-2}, i{r-j-1}):")
+            loops.append(_INDENT * (j+1) + f"x{r-j-2} = queue[i{r-j-2}]")
         
-        # Inner loop and yield statement:
-        code.append(_INDENT * r + "for i0 in range(i1):")
-        code.append(_INDENT * (r+1) + "yield queue[i0], " + ', '.join(f"x{i}" for i in range(1, r)))
+        # Loop on x1, inner loop and yield statement (or call):
+        inner = _INDENT * (r-3)
+        elements = ', '.join(f"x{i}" for i in range(r))
+        short_loops = loops + [inner + "for i1 in range(1, i2):",
+                               inner + _INDENT + "x1 = queue[i1]",
+                               inner + _INDENT + "for x0 in queue[:i1]:",
+                               inner + _INDENT * 2 + (f"fn({elements})" if callback else f"yield {elements}")]
+        if callback:
+            code.extend(_INDENT * 2 + line for line in short_loops)
+        else:
+            # Once the queue is long enough, inner loops of at least zip_start elements run with zip:
+            zip_start = _ZIP_RUN * r
+            long_loops = loops + [inner + f"for i1 in range(1, i2 if i2 < {zip_start} else {zip_start}):",
+                                  inner + _INDENT + "x1 = queue[i1]",
+                                  inner + _INDENT + "for x0 in queue[:i1]:",
+                                  inner + _INDENT * 2 + f"yield {elements}",
+                                  inner + f"for i1 in range({zip_start}, i2):",
+                                  inner + _INDENT + "x1 = queue[i1]",
+                                  inner + _INDENT + "yield from zip(queue[:i1], "
+                                  + ', '.join(f"_repeat(x{i})" for i in range(1, r)) + ")"]
+            code.append(_INDENT * 2 + f"if i{r-1} <= {zip_start}:")
+            code.extend(_INDENT * 3 + line for line in short_loops)
+            code.append(_INDENT * 2 + "else:")
+            code.extend(_INDENT * 3 + line for line in long_loops)
         
         # Append to queue:
-        code.append(_INDENT * 2 + f"queue.append(x{r-1})")
+        code.append(_INDENT * 2 + f"append(x{r-1})")
         code.append(_INDENT * 2 + f"i{r-1} += 1")
         
         # Execute and return function object
-        namespace = {}
-        exec('\n'.join(code), namespace)
-        return namespace[f"_{r}_combinations"]
+        return _define_function(code, f"_{r}_combinations")
     
     @staticmethod
     def _unnested(stream, r):
         """Generate sequences of length r from generator (stream)"""
-        indices = [0] * r   # Indices of elements in current sequence
-        queue = [None] * r   # All elements from stream so far
-        sequence = [None] * r   # Elements in current sequence - always yield tuple(sequence)
-        j = 0   # Position (in indices and sequence) that needs to be updated 
         
         # Initialize with first r elements, if they exist:
-        for x in stream:
-            indices[j] = j
-            queue[j] = x
-            sequence[j] = x
-            if j == r - 1:
-                yield tuple(sequence)
-                break
-            else:
-                j += 1
+        queue = list(_islice(stream, r))   # All elements from stream so far
+        if len(queue) < r:
+            return
+        
+        indices = list(range(r)) + [None]   # Indices of elements in current sequence, and a sentinel ending the reset cascade
+        append = queue.append
+        sequence = queue[:]   # Elements in current sequence - always yield to_tuple(sequence), so it must stay a list (copied directly, not iterated)
+        to_tuple = tuple   # Local binding avoids a builtins lookup on every yield
+        yield to_tuple(sequence)
+        
+        last = r - 1   # Last position, hoisted out of the loops
+        j = last   # Position (in indices and sequence) that needs to be updated
         
         # Sequences from remaining elements, if they exist:
         for x in stream:
             indices[j] += 1   # We always have j=r-1 at this point
-            queue.append(x)
+            append(x)
             sequence[j] = x
-            yield tuple(sequence)
+            yield to_tuple(sequence)
             j -= 1   # Next position to update
             while True:
-                indices[j] += 1
-                sequence[j] = queue[indices[j]]
-                yield tuple(sequence)
-                # Update j for next modification, and reset first elements in sequence if needed:
                 if j > 0:
+                    i = indices[j] + 1
+                    indices[j] = i
+                    sequence[j] = queue[i]
+                    yield to_tuple(sequence)
                     j -= 1
                 else:
-                    while j < r - 1 and indices[j] + 1 == indices[j + 1]:
+                    # First position runs through its remaining elements, as a slice of queue:
+                    for x0 in queue[indices[0] + 1:indices[1]]:
+                        sequence[0] = x0
+                        yield to_tuple(sequence)
+                    # Reset first elements in sequence, and update j for next modification:
+                    indices[0] = 0
+                    sequence[0] = queue[0]
+                    j = 1
+                    while indices[j] + 1 == indices[j + 1]:
                         indices[j] = j
                         sequence[j] = queue[j]
                         j += 1
-                    if j == r - 1: break
+                    if j == last: break
 
 class combinations_with_replacement(_combinations_base):
     """Return r length subsequences of elements from the input iterable in colexicographic order, with replacement (elements from iterable may be repeated in a subsequence).
@@ -174,39 +275,65 @@ class combinations_with_replacement(_combinations_base):
         combinations('ABC', 2) → AA AB BB AC BC CC
     """
     
+    __slots__ = ()
     _nested_function_cache = {0: _0_combinations, 1: _1_combinations,
                               2: _2_combinations_with_replacement}
+    _callback_function_cache = {}
     
     @staticmethod
-    def _nested_function(r):
+    def _count(n, r):
+        """Number of combinations of length r (with replacement) from n elements"""
+        return _comb(n + r - 1, r) if n else int(r == 0)
+    
+    @staticmethod
+    def _nested_function(r, callback=False):
         """Returns a function yielding sequences of length r (with replacement) from input generator.
         
-        Implemented with r nested loops, and r must be >= 3."""
+        Implemented with r nested loops, and r must be >= 3.
+        If callback, the function takes (iterable, fn) and calls fn with the elements of each sequence instead."""
         if r < 3:
             raise ValueError("r must be at least 3")
             
         # Function definition, queue initilization, and outer loop:
-        code = [f"def _{r}_combinations_with_replacement(iterable):",
+        code = [f"def _{r}_combinations_with_replacement(iterable{', fn' if callback else ''}):",
                 _INDENT + f"queue = []",
-                _INDENT + f"for x{r-1} in iterable:",
-                _INDENT * 2 + f"queue.append(x{r-1})"]
-
-        # 2-nd loop:
-        code.append(_INDENT * 2 + f"for i{r-2}, x{r-2} in enumerate(queue):")
+                _INDENT + "append = queue.append",
+                _INDENT + f"for i{r-1}, x{r-1} in enumerate(iterable):",
+                _INDENT * 2 + f"append(x{r-1})"]
 
-        # Nested loops:
+        # Nested loops on x{r-2}, ..., x2 (their order, with x0 varying fastest, is what makes the output colexicographic):
+        loops = []
         for j in range(r - 3):
-            code.append(_INDENT * (j+3) + f"for i{r-j-3} in range(i{r-j-2} + 1):")
-            code.append(_INDENT * (j+4) + f"x{r-j-3} = queue[i{r-j-3}]")
+            loops.append(_INDENT * j + f"for i{r-j-2} in range(i{r-j-1} + 1):")
+            loops.append(_INDENT * (j+1) + f"x{r-j-2} = queue[i{r-j-2}]")
 
-        # Inner loop and yield statement:
-        code.append(_INDENT * r + "for i0 in range(i1 + 1):")
-        code.append(_INDENT * (r+1) + "yield queue[i0], " + ', '.join(f"x{i}" for i in range(1, r)))
+        # Loop on x1, inner loop and yield statement (or call):
+        inner = _INDENT * (r-3)
+        elements = ', '.join(f"x{i}" for i in range(r))
+        short_loops = loops + [inner + "for i1 in range(i2 + 1):",
+                               inner + _INDENT + "x1 = queue[i1]",
+                               inner + _INDENT + "for x0 in queue[:i1 + 1]:",
+                               inner + _INDENT * 2 + (f"fn({elements})" if callback else f"yield {elements}")]
+        if callback:
+            code.extend(_INDENT * 2 + line for line in short_loops)
+        else:
+            # Once the queue is long enough, inner loops of more than zip_start elements run with zip:
+            zip_start = _ZIP_RUN * r - 1
+            long_loops = loops + [inner + f"for i1 in range(i2 + 1 if i2 < {zip_start} else {zip_start}):",
+                                  inner + _INDENT + "x1 = queue[i1]",
+                                  inner + _INDENT + "for x0 in queue[:i1 + 1]:",
+                                  inner + _INDENT * 2 + f"yield {elements}",
+                                  inner + f"for i1 in range({zip_start}, i2 + 1):",
+                                  inner + _INDENT + "x1 = queue[i1]",
+                                  inner + _INDENT + "yield from zip(queue[:i1 + 1], "
+                                  + ', '.join(f"_repeat(x{i})" for i in range(1, r)) + ")"]
+            code.append(_INDENT * 2 + f"if i{r-1} < {zip_start}:")
+            code.extend(_INDENT * 3 + line for line in short_loops)
+            code.append(_INDENT * 2 + "else:")
+            code.extend(_INDENT * 3 + line for line in long_loops)
         
         # Execute and return function object
-        namespace = {}
-        exec('\n'.join(code), namespace)
-        return namespace[f"_{r}_combinations_with_replacement"]
+        return _define_function(code, f"_{r}_combinations_with_replacement")
     
     @staticmethod
     def _unnested(stream, r):
@@ -218,30 +345,41 @@ class combinations_with_replacement(_combinations_base):
         except StopIteration:
             return
 
-        indices = [0] * r   # Keeps track of the indices of elements from stream for current sequence
+        indices = [0] * r + [None]   # Indices of elements from stream for current sequence, and a sentinel ending the reset cascade
         queue = [first_item]   # All elements from stream so far
-        sequence = [first_item] * r   # Elements in current sequence - always yield tuple(sequence)
-        yield tuple(sequence)
+        append = queue.append
+        sequence = [first_item] * r   # Elements in current sequence - always yield to_tuple(sequence), so it must stay a list (copied directly, not iterated)
+        to_tuple = tuple   # Local binding avoids a builtins lookup on every yield
+        yield to_tuple(sequence)
 
-        j = r - 1   # Position that needs to be updated (in indices and sequence)
+        last = r - 1   # Last position, hoisted out of the loops
+        j = last   # Position that needs to be updated (in indices and sequence)
 
         # Use remaining elements, if they exist:
         for x in stream:
             indices[j] += 1   # We always have j=r-1 at this point
-            queue.append(x)
+            append(x)
             sequence[j] = x
-            yield tuple(sequence)
+            yield to_tuple(sequence)
             j -= 1   # Next position to update
             while True:
-                indices[j] += 1
-                sequence[j] = queue[indices[j]]
-                yield tuple(sequence)
-                # Update j for next modification, and reset first sequence elements if needed:
                 if j > 0:
+                    i = indices[j] + 1
+                    indices[j] = i
+                    sequence[j] = queue[i]
+                    yield to_tuple(sequence)
                     j -= 1
                 else:
-                    while j < r - 1 and indices[j] == indices[j + 1]:
+                    # First position runs through its remaining elements, as a slice of queue:
+                    for x0 in queue[indices[0] + 1:indices[1] + 1]:
+                        sequence[0] = x0
+                        yield to_tuple(sequence)
+                    # Reset first sequence elements, and update j for next modification:
+                    indices[0] = 0
+                    sequence[0] = first_item
+                    j = 1
+                    while indices[j] == indices[j + 1]:
                         indices[j] = 0
                         sequence[j] = first_item
                         j += 1
-                    if j == r - 1: break
\ No newline at end of file
+                    if j == last: break
\ No newline at end of file
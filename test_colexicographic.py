@@ -0,0 +1,137 @@
+"""Tests comparing colexicographic combinations against itertools, sorted into colexicographic order."""
+
+import itertools
+import operator
+import unittest
+from unittest import mock
+
+import colexicographic
+from colexicographic import combinations, combinations_with_replacement
+
+_CASES = ((combinations, itertools.combinations),
+          (combinations_with_replacement, itertools.combinations_with_replacement))
+
+def colex(iterable, r, reference):
+    """Return the reference combinations of iterable, sorted into colexicographic order"""
+    return sorted(reference(iterable, r), key=lambda t: t[::-1])
+
+class TestCombinations(unittest.TestCase):
+    
+    def test_short_inputs(self):
+        # Covers the hand-written (r <= 2), generated (3 <= r <= 20) and unnested (r > 20) functions
+        for cls, reference in _CASES:
+            for r in range(26):
+                for n in range(9 if r < 10 else 5):
+                    with self.subTest(cls=cls.__name__, r=r, n=n):
+                        self.assertEqual(list(cls(range(n), r)), colex(range(n), r, reference))
+                        self.assertEqual(list(cls(iter(range(n)), r)), colex(range(n), r, reference))
+    
+    def test_long_inputs(self):
+        # Long enough for the generated functions to run their longest inner loops with zip
+        for cls, reference in _CASES:
+            for r, n in ((2, 200), (3, 120), (4, 70)):
+                with self.subTest(cls=cls.__name__, r=r, n=n):
+                    self.assertEqual(list(cls(range(n), r)), colex(range(n), r, reference))
+    
+    def test_zip_inner_loops(self):
+        # A low _ZIP_RUN makes short inputs reach the zip inner loops of every generated function
+        for zip_run, rs in ((1, range(3, 9)), (2, range(3, 7)), (3, range(3, 6))):
+            with mock.patch.object(colexicographic, '_ZIP_RUN', zip_run):
+                for cls, reference in _CASES:
+                    for r in rs:
+                        nested_function = cls._nested_function(r)
+                        for n in (zip_run * r + r - 2, zip_run * r + r):
+                            with self.subTest(cls=cls.__name__, zip_run=zip_run, r=r, n=n):
+                                self.assertEqual(list(nested_function(iter(range(n)))), colex(range(n), r, reference))
+    
+    def test_infinite_input(self):
+        # In colexicographic order, the combinations of the first n elements come first
+        for cls, reference in _CASES:
+            for r, n in ((2, 15), (3, 15), (5, 12), (22, 24)):
+                n = n if cls is combinations else n - r + 1
+                with self.subTest(cls=cls.__name__, r=r, n=n):
+                    expected = colex(range(n), r, reference)
+                    self.assertEqual(list(itertools.islice(cls(itertools.count(), r), len(expected))), expected)
+    
+    def test_for_each(self):
+        for cls, reference in _CASES:
+            for r, n in ((0, 3), (1, 5), (2, 6), (3, 8), (5, 9), (3, 120), (22, 24)):
+                n = n if cls is combinations or r < 10 else 3
+                with self.subTest(cls=cls.__name__, r=r, n=n):
+                    calls = []
+                    cls.for_each(range(n), r, lambda *args: calls.append(args))
+                    self.assertEqual(calls, colex(range(n), r, reference))
+    
+    def test_for_each_generated(self):
+        # Every generated callback function (3 <= r <= 20), fed an iterator
+        for cls, reference in _CASES:
+            for r in range(3, 21):
+                n = r + 2 if cls is combinations else 3
+                with self.subTest(cls=cls.__name__, r=r, n=n):
+                    calls = []
+                    cls.for_each(iter(range(n)), r, lambda *args: calls.append(args))
+                    self.assertEqual(calls, colex(range(n), r, reference))
+    
+    def test_for_each_infinite_input(self):
+        # On infinite input, for_each stops only when fn raises
+        class Stop(Exception):
+            pass
+        def collect(*args):
+            calls.append(args)
+            if len(calls) == len(expected):
+                raise Stop
+        for cls, reference in _CASES:
+            for r, n in ((2, 12), (3, 12), (6, 12), (22, 24)):
+                n = n if cls is combinations else n - r + 1
+                with self.subTest(cls=cls.__name__, r=r, n=n):
+                    calls, expected = [], colex(range(n), r, reference)
+                    with self.assertRaises(Stop):
+                        cls.for_each(itertools.count(), r, collect)
+                    self.assertEqual(calls, expected)
+    
+    def test_batched(self):
+        for cls, reference in _CASES:
+            for batch_size in (1, 4, 4096):
+                with self.subTest(cls=cls.__name__, batch_size=batch_size):
+                    batches = list(cls(range(10), 3).batched(batch_size))
+                    self.assertTrue(all(0 < len(batch) <= batch_size for batch in batches))
+                    self.assertEqual([t for batch in batches for t in batch], colex(range(10), 3, reference))
+        self.assertEqual(list(combinations('', 2).batched()), [])
+        with self.assertRaises(ValueError):
+            combinations('AB', 1).batched(0)
+    
+    def test_length_hint(self):
+        for cls, reference in _CASES:
+            for r in range(6):
+                for n in range(6):
+                    with self.subTest(cls=cls.__name__, r=r, n=n):
+                        self.assertEqual(operator.length_hint(cls(range(n), r)), len(colex(range(n), r, reference)))
+            self.assertEqual(operator.length_hint(cls(iter(range(4)), 2), -1), -1)
+    
+    def test_unsized_length(self):
+        # __len__ that fails must not prevent iteration
+        class BrokenLength:
+            def __iter__(self):
+                return iter('ABC')
+            def __len__(self):
+                raise TypeError("no length")
+        for cls, reference in _CASES:
+            with self.subTest(cls=cls.__name__):
+                self.assertEqual(list(cls(BrokenLength(), 2)), colex('ABC', 2, reference))
+                self.assertEqual(next(iter(cls(range(2**70), 2))), colex(range(2), 2, reference)[0])
+                self.assertEqual(operator.length_hint(cls(range(2**70), 2), -1), -1)
+    
+    def test_invalid_r(self):
+        with self.assertRaises(ValueError):
+            combinations('AB', -1)
+        with self.assertRaises(TypeError):
+            combinations_with_replacement('AB', 1.5)
+    
+    def test_star_import(self):
+        namespace = {}
+        exec("from colexicographic import *", namespace)
+        self.assertEqual(sorted(name for name in namespace if name != '__builtins__'),
+                         ['combinations', 'combinations_with_replacement'])
+
+if __name__ == '__main__':
+    unittest.main()